@@ -158,7 +158,7 @@ class ArchIndependentStructure:
         return struct_type
 
     def __init__(self, binary_offset: int, struct_bytes: bytearray, backing_layout: Type[Structure]):
-        struct: ArchIndependentStructure = backing_layout.from_buffer(struct_bytes)  # type: ignore
+        struct: ArchIndependentStructure = backing_layout.from_buffer_copy(struct_bytes)  # type: ignore
 
         for field_name, *_ in struct._fields_:
             # clone fields from struct to this class
@@ -1,10 +1,13 @@
-from ctypes import Structure, c_uint32, sizeof
+import mmap
+from ctypes import Structure, sizeof
 from pathlib import Path
+from types import TracebackType
 from typing import Dict, List, Optional, Tuple, Type, TypeVar
 
 from strongarm.logger import strongarm_logger
 from strongarm.macho.macho_binary import MachoBinary
 from strongarm.macho.macho_definitions import (
+    MAGIC_STRUCT,
     DyldSharedCacheHeader,
     DyldSharedCacheImageInfo,
     DyldSharedFileMapping,
@@ -33,6 +36,11 @@ class DyldSharedCacheParser:
 
     def __init__(self, path: Path) -> None:
         self.path = path
+        # Embedded binaries read through this parser for every access outside their __TEXT buffer.
+        # DSC's are large, so map the file once and let the OS page in only the regions we actually read.
+        # The mapping holds its own reference to the file, so the file object itself isn't needed past this point
+        with open(str(self.path), "rb") as dsc_file:
+            self._mmap = mmap.mmap(dsc_file.fileno(), 0, access=mmap.ACCESS_READ)
 
         # DSC's are split into 3 "mappings", or segments:
         # Mapping 0 is the executable segment. __TEXT of embedded binaries is placed here
@@ -48,12 +56,35 @@ class DyldSharedCacheParser:
         # - The VM pointer to the end-address of the Mach-O's __TEXT segment
         self.embedded_binary_info: Dict[Path, Tuple[VirtualMemoryPointer, VirtualMemoryPointer]] = {}
 
-        self._parse()
+        try:
+            self._parse()
+        except BaseException:
+            # Don't leave the file mapped if the input couldn't be parsed
+            self.close()
+            raise
+
+    def __enter__(self) -> "DyldSharedCacheParser":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the file mapping backing this parser.
+        Embedded binaries retrieved from this parser read all of their data through it, so every read from such a
+        binary raises ValueError afterwards. Close the parser only once its embedded binaries are no longer needed.
+        """
+        self._mmap.close()
 
     @property
     def file_magic(self) -> int:
         """Read file magic."""
-        return c_uint32.from_buffer(bytearray(self.get_bytes(StaticFilePointer(0), sizeof(c_uint32)))).value
+        return MAGIC_STRUCT.unpack_from(self._mmap, 0)[0]
 
     def get_bytes(self, offset: StaticFilePointer, size: int) -> bytes:
         """Read a region of bytes from the input file
@@ -63,9 +94,7 @@ class DyldSharedCacheParser:
         Returns:
             Byte list representing contents of file at provided address
         """
-        with open(str(self.path), "rb") as binary_file:
-            binary_file.seek(offset)
-            return binary_file.read(size)
+        return self._mmap[offset : offset + size]
 
     def read_struct(self, file_offset: StaticFilePointer, struct_type: Type[_StructureT]) -> _StructureT:
         """Given a file offset, return the structure it describes
@@ -75,25 +104,23 @@ class DyldSharedCacheParser:
         Returns:
             struct_type loaded from the pointed address
         """
-        data = bytearray(self.get_bytes(file_offset, sizeof(struct_type)))
-        return struct_type.from_buffer(data)  # type: ignore
+        return struct_type.from_buffer_copy(self._mmap, file_offset)
 
     def _read_static_c_string(self, start_address: StaticFilePointer) -> Optional[str]:
         """Return a string containing the bytes from start_address up to the next NULL character
         This method will return None if the specified address does not point to a UTF-8 encoded string
         """
         max_len = 16
-        symbol_name_characters = []
+        symbol_name_bytes = bytearray()
         found_null_terminator = False
 
         while not found_null_terminator:
             name_bytes = self.get_bytes(start_address, max_len)
             # search for null terminator in this content
-            for ch in name_bytes:
-                if ch == 0x00:
-                    found_null_terminator = True
-                    break
-                symbol_name_characters.append(ch)
+            null_idx = name_bytes.find(0)
+            found_null_terminator = null_idx != -1
+            # accumulate the raw bytes, and only decode once the full string has been read
+            symbol_name_bytes += name_bytes[:null_idx] if found_null_terminator else name_bytes
 
             # do we need to keep searching for the end of the symbol name?
             if not found_null_terminator:
@@ -104,7 +131,7 @@ class DyldSharedCacheParser:
             else:
                 # read full string!
                 try:
-                    symbol_name = bytearray(symbol_name_characters).decode("UTF-8")
+                    symbol_name = symbol_name_bytes.decode("UTF-8")
                     return symbol_name
                 except UnicodeDecodeError:
                     # if decoding the string failed, we may have been passed an address which does not actually
@@ -195,7 +222,10 @@ class DyldSharedCacheParser:
         raise ValueError(f"Could not find address within DSC address space: {vm_addr}")
 
     def get_embedded_binary(self, binary_path: Path) -> "DyldSharedCacheBinary":
-        """Given a path to a binary embedded in the DSC, retrieve & parse the embedded binary."""
+        """Given a path to a binary embedded in the DSC, retrieve & parse the embedded binary.
+        The returned binary reads all of its data through this parser, so the parser must outlive it (i.e. must not be
+        closed while the binary is still in use).
+        """
         if binary_path not in self.embedded_binary_info:
             raise ValueError(f"DSC does not contain {binary_path}")
 
@@ -239,6 +269,9 @@ class DyldSharedCacheBinary(MachoBinary):
         self.dyld_shared_cache_parser = dsc_parser
         self.dyld_shared_cache_file_offset = file_offset
         super().__init__(path, binary_data)
+        # Section headers are read through the DSC parser. Parse them up front, as MachoBinary defers this
+        # until first use, so that sections remain available once the parser has been closed
+        self._parse_pending_sections()
 
     def file_offset_for_virtual_address(self, virtual_address: VirtualMemoryPointer) -> StaticFilePointer:
         # Translate into the global DSC file
@@ -10,7 +10,7 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, TypeVar, cast
 
 from capstone import CS_ARCH_ARM64, CS_MODE_ARM, Cs, CsInsn
-from more_itertools import first, pairwise
+from more_itertools import pairwise
 
 from strongarm.logger import strongarm_logger
 from strongarm.macho.arch_independent_structs import CFString32, CFString64, CFStringStruct
@@ -34,6 +34,11 @@ logger = strongarm_logger.getChild(__file__)
 
 _T = TypeVar("_T")
 
+# Creating a Capstone handle is expensive, so every analyzer shares one.
+# Detail mode is required, as callers inspect the operands of the disassembled instructions.
+_CS = Cs(CS_ARCH_ARM64, CS_MODE_ARM)
+_CS.detail = True
+
 
 ANALYZER_SQL_SCHEMA = """
     CREATE TABLE function_boundaries(
@@ -155,8 +160,7 @@ class MachoAnalyzer:
 
     def __init__(self, binary: MachoBinary) -> None:
         self.binary = binary
-        self.cs = Cs(CS_ARCH_ARM64, CS_MODE_ARM)
-        self.cs.detail = True
+        self.cs = _CS
 
         # Each __stubs function calls a single dyld stub address, which has a corresponding DyldBoundSymbol.
         # Map of each __stub function to the associated name of the DyldBoundSymbol
@@ -505,20 +509,19 @@ class MachoAnalyzer:
 
     def exported_symbol_name_for_address(self, address: VirtualMemoryPointer) -> Optional[str]:
         """Return the symbol name for the provided address, or None if the address is not a named exported symbol."""
-        if address in self.exported_symbol_pointers_to_names:
-            return self.exported_symbol_pointers_to_names[address]
-        return None
+        return self.exported_symbol_pointers_to_names.get(address)
 
     def symbol_name_for_branch_destination(self, branch_address: VirtualMemoryPointer) -> str:
         """Get the associated symbol name for a given branch destination."""
-        if branch_address in self.imp_stubs_to_symbol_names:
-            return self.imp_stubs_to_symbol_names[branch_address]
+        symbol_name = self.imp_stubs_to_symbol_names.get(branch_address)
+        if symbol_name is not None:
+            return symbol_name
         raise RuntimeError(f"Unknown branch destination {hex(branch_address)}. Is this a local branch?")
 
     def disassemble_region(self, start_address: VirtualMemoryPointer, size: int) -> List[CsInsn]:
         """Disassemble the executable code in a given region into a list of CsInsn objects."""
         func_str = bytes(self.binary.get_content_from_virtual_address(virtual_address=start_address, size=size))
-        instructions = [instr for instr in self.cs.disasm(func_str, start_address)]
+        instructions = list(self.cs.disasm(func_str, start_address))
         if not len(instructions):
             raise DisassemblyFailedError(f"Failed to disassemble code at {hex(start_address)}:{hex(size)}")
         return instructions
@@ -646,27 +649,52 @@ class MachoAnalyzer:
         # Invalid classref
         return None
 
+    @cached_property
+    def _imported_class_names_to_classrefs(self) -> Dict[str, VirtualMemoryPointer]:
+        """Map each imported class name to the first of its bindings which is located in __objc_classrefs.
+        A class may be bound to several locations (such as the base class of a category in __objc_const), and only
+        the __objc_classrefs binding is a classref.
+        """
+        classrefs: Dict[str, VirtualMemoryPointer] = {}
+        for addr, name in self.imported_symbols_to_symbol_names.items():
+            if name in classrefs:
+                continue
+            if self.binary.section_name_for_address(addr) == "__objc_classrefs":
+                classrefs[name] = addr
+        return classrefs
+
+    @cached_property
+    def _local_class_names_to_class_pointers(self) -> Dict[str, VirtualMemoryPointer]:
+        """Map each class name implemented within the binary to the location of its first definition."""
+        class_pointers: Dict[str, VirtualMemoryPointer] = {}
+        for objc_class in self.objc_classes():
+            class_pointers.setdefault(objc_class.name, VirtualMemoryPointer(objc_class.raw_struct.binary_offset))
+        return class_pointers
+
+    @cached_property
+    def _class_pointers_to_local_classrefs(self) -> Dict[VirtualMemoryPointer, VirtualMemoryPointer]:
+        """Map each class pointer contained in __objc_classrefs to the first classref which holds it.
+        Inverse of MachoBinary.read_pointer_section("__objc_classrefs")
+        """
+        classrefs: Dict[VirtualMemoryPointer, VirtualMemoryPointer] = {}
+        for classref, class_pointer in self.binary.read_pointer_section("__objc_classrefs").items():
+            classrefs.setdefault(class_pointer, classref)
+        return classrefs
+
     def classref_for_class_name(self, class_name: str) -> Optional[VirtualMemoryPointer]:
         """Given a class name, try to find a classref for it."""
-        classrefs = [
-            addr
-            for addr, name in self.imported_symbols_to_symbol_names.items()
-            if name == class_name and self.binary.section_name_for_address(addr) == "__objc_classrefs"
-        ]
-        if len(classrefs):
-            return classrefs[0]
+        imported_classref = self._imported_class_names_to_classrefs.get(class_name)
+        if imported_classref is not None:
+            return imported_classref
 
-        # TODO(PT): this is expensive! We should do one analysis step of __objc_classrefs and create a map.
         # is it a local class?
-        class_locations = [x.raw_struct.binary_offset for x in self.objc_classes() if x.name == class_name]
-        if not len(class_locations):
+        class_location = self._local_class_names_to_class_pointers.get(class_name)
+        if class_location is None:
             # unknown class name
             return None
-        class_location = VirtualMemoryPointer(class_locations[0])
 
-        classref_addr_to_pointer_map = self.binary.read_pointer_section("__objc_classrefs")
         # If None is returned, it is an unknown class name
-        return first((k for k, v in classref_addr_to_pointer_map.items() if v == class_location), None)
+        return self._class_pointers_to_local_classrefs.get(class_location)
 
     def selref_for_selector_name(self, selector_name: str) -> Optional[VirtualMemoryPointer]:
         return self.objc_helper.selref_for_selector_name(selector_name)
@@ -711,9 +739,7 @@ class MachoAnalyzer:
         strings_content = self.binary.get_bytes(cstring_section.offset, cstring_section.size)
 
         string_to_stringrefs = {}
-        # split into characters (string table is packed and each entry is terminated by a null character)
-        string_table = list(strings_content)
-        transformed_strings = MachoStringTableHelper.transform_string_section(string_table)
+        transformed_strings = MachoStringTableHelper.transform_string_section(strings_content)
         for idx, entry in transformed_strings.items():
             # Address is the base of __cstring plus the index of the entry
             stringref_address = VirtualMemoryPointer(strings_base + idx)
@@ -724,9 +750,7 @@ class MachoAnalyzer:
         """Try to find the stringref in __cstrings for a provided C string.
         If the string is not present in the __cstrings section, this method returns None.
         """
-        if string not in self._cstring_to_stringref_map:
-            return None
-        return self._cstring_to_stringref_map[string]
+        return self._cstring_to_stringref_map.get(string)
 
     def _build_cfstring_map(self) -> Dict[str, VirtualMemoryPointer]:
         cfstrings_section = self.binary.section_with_name("__cfstring", "__DATA")
@@ -752,9 +776,7 @@ class MachoAnalyzer:
         """Try to find the stringref in __cfstrings for a provided Objective-C string literal.
         If the string is not present in the __cfstrings section, this method returns None.
         """
-        if string not in self._cfstring_to_stringref_map:
-            return None
-        return self._cfstring_to_stringref_map[string]
+        return self._cfstring_to_stringref_map.get(string)
 
     def stringref_for_string(self, string: str) -> Optional[VirtualMemoryPointer]:
         """Try to find the stringref for a provided string.
@@ -859,6 +881,6 @@ class MachoAnalyzer:
         string_section = self.binary.section_with_name(section_name, segment_name)
         if string_section:
             strings_content = self.binary.get_bytes(string_section.offset, string_section.size)
-            transformed_strings = MachoStringTableHelper.transform_string_section(list(strings_content))
+            transformed_strings = MachoStringTableHelper.transform_string_section(strings_content)
             discovered_strings = set((x.full_string for x in transformed_strings.values()))
         return discovered_strings
@@ -1,8 +1,14 @@
+import functools
 import math
+import weakref
+from bisect import bisect_right
 from ctypes import Structure, c_uint32, c_uint64, sizeof
 from distutils.version import LooseVersion
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Type, TypeVar
+from struct import Struct, iter_unpack
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Type, TypeVar, Union
+
+from more_itertools import pairwise
 
 from strongarm.logger import strongarm_logger
 from strongarm.macho.arch_independent_structs import (
@@ -16,7 +22,6 @@ from strongarm.macho.arch_independent_structs import (
     MachoEncryptionInfoStruct,
     MachoHeaderStruct,
     MachoLinkeditDataCommandStruct,
-    MachoLoadCommandStruct,
     MachoNlistStruct,
     MachoSectionRawStruct,
     MachoSegmentCommandStruct,
@@ -25,6 +30,7 @@ from strongarm.macho.arch_independent_structs import (
 from strongarm.macho.macho_definitions import (
     CPU_TYPE,
     HEADER_FLAGS,
+    MAGIC_STRUCT,
     BindSpecialDylibOrdinal,
     DylibCommand,
     DylibStruct,
@@ -45,6 +51,11 @@ logger = strongarm_logger.getChild(__file__)
 
 AIS = TypeVar("AIS", bound=ArchIndependentStructure)
 
+# struct load_command { uint32_t cmd; uint32_t cmdsize; }
+# Every load command begins with this header. Decode it directly so we only build a full structure for the commands
+# we retain.
+_LOAD_COMMAND_HEADER = Struct("<II")
+
 
 class BinaryEncryptedError(Exception):
     """Raised when the binary is encrypted."""
@@ -101,12 +112,25 @@ class MachoSegment:
         self.end_address = self.offset + self.size
 
         self.section_count = segment_command.nsects
-        self.sections: List["MachoSection"] = []
+        self._sections: List["MachoSection"] = []
+        # Weak reference to the owning MachoBinary, set until this segment's section headers have been parsed.
+        # This is weak so that the segment doesn't form a reference cycle with the binary
+        self._unparsed_sections_owner: Optional["weakref.ReferenceType[MachoBinary]"] = None
 
         self.maxprot = segment_command.maxprot
         self.initprot = segment_command.initprot
         self.flags = segment_command.flags
 
+    @property
+    def sections(self) -> List["MachoSection"]:
+        """The sections contained within this segment. Section headers are parsed on first access."""
+        if self._unparsed_sections_owner is not None:
+            binary = self._unparsed_sections_owner()
+            if binary is None:
+                raise RuntimeError(f"Cannot parse sections of {self.name}: its MachoBinary has been freed")
+            binary._parse_pending_sections()
+        return self._sections
+
     def __repr__(self) -> str:
         virtual_loc = f"[0x{self.vmaddr:011x} - 0x{self.vm_end_address:011x}]"
         file_loc = f"[0x{self.offset:011x} - 0x{self.end_address:011x}]"
@@ -144,20 +168,39 @@ def _version_from_nibbles(value: int) -> LooseVersion:
     return LooseVersion(f"{major}.{minor}.{patch}")
 
 
+@functools.lru_cache(maxsize=None)
+def _pointer_field_offsets(backing_layout: Type[Structure]) -> Tuple[Tuple[str, int], ...]:
+    """Return the name and offset of each c_uint64 field within a structure layout.
+    These are the only fields which may hold a rebased pointer.
+    """
+    return tuple(
+        (field_name, getattr(backing_layout, field_name).offset)
+        for field_name, field_type, *_ in backing_layout._fields_
+        if field_type == c_uint64
+    )
+
+
 class MachoBinary:
-    _MAG_64 = [MachArch.MH_MAGIC_64, MachArch.MH_CIGAM_64]
-    _MAG_32 = [MachArch.MH_MAGIC, MachArch.MH_CIGAM]
-    _MAG_BIG_ENDIAN = [MachArch.MH_CIGAM, MachArch.MH_CIGAM_64]
-    SUPPORTED_MAG = _MAG_64 + _MAG_32
+    _MAG_64 = frozenset((MachArch.MH_MAGIC_64, MachArch.MH_CIGAM_64))
+    _MAG_32 = frozenset((MachArch.MH_MAGIC, MachArch.MH_CIGAM))
+    _MAG_BIG_ENDIAN = frozenset((MachArch.MH_CIGAM, MachArch.MH_CIGAM_64))
+    SUPPORTED_MAG = _MAG_64 | _MAG_32
     BYTES_PER_INSTRUCTION = 4
 
-    def __init__(self, path: Path, binary_data: bytes, file_offset: Optional[StaticFilePointer] = None) -> None:
+    def __init__(
+        self,
+        path: Path,
+        binary_data: Union[bytes, bytearray],
+        file_offset: Optional[StaticFilePointer] = None,
+    ) -> None:
         """Parse the bytes representing a Mach-O file."""
         from .codesign.codesign_parser import CodesignParser
 
-        self._cached_binary = binary_data
+        # Slicing a memoryview doesn't copy, so get_bytes() only pays for the copy into the returned bytearray
+        self._cached_binary = memoryview(binary_data)
 
         self.path = path
+        self._slice_magic: Optional[int] = None
         self.is_64bit: bool = False
         self.is_swap: bool = False
         self.slice_filesize = len(binary_data)
@@ -173,7 +216,17 @@ class MachoBinary:
 
         # Segment and section commands from Mach-O header
         self.segments: List[MachoSegment] = []
-        self.sections: List[MachoSection] = []
+        self._sections: List[MachoSection] = []
+        # Section headers are only parsed once a section is requested. Until then, remember where each segment's are
+        self._segments_with_unparsed_sections: List[Tuple[MachoSegment, StaticFilePointer]] = []
+        # Non-empty sections sorted by address, and their start addresses, for section_for_address(). Built on first use
+        self._sections_by_address: Optional[List[MachoSection]] = None
+        self._section_start_addresses: List[int] = []
+        self._sections_overlap = False
+        self._max_section: Optional[MachoSection] = None
+        # Name lookups for the above. If names are duplicated, the first segment or section with the name wins
+        self._segments_by_name: Dict[str, MachoSegment] = {}
+        self._sections_by_name: Dict[Tuple[str, str], MachoSection] = {}
 
         # Interesting Mach-O sections
         self.linked_dylibs: List[DynamicLibrary] = []
@@ -188,6 +241,7 @@ class MachoBinary:
         self._code_signature_cmd: Optional[MachoLinkeditDataCommandStruct] = None
         self._function_starts_cmd: Optional[MachoLinkeditDataCommandStruct] = None
         self._functions_list: Optional[Set[VirtualMemoryPointer]] = None
+        self._pointer_sections: Dict[str, Dict[VirtualMemoryPointer, VirtualMemoryPointer]] = {}
         self._build_version_cmd: Optional[MachoBuildVersionCommandStruct] = None
         self._build_tool_versions: Optional[List[MachoBuildToolVersionStruct]] = None
 
@@ -254,7 +308,10 @@ class MachoBinary:
     @property
     def slice_magic(self) -> int:
         """Read magic number identifier from this Mach-O slice."""
-        return self.read_word(0, virtual=False, word_type=c_uint32)
+        # The magic is consulted several times while validating the slice, so only read it once
+        if self._slice_magic is None:
+            self._slice_magic = MAGIC_STRUCT.unpack(self.get_bytes(StaticFilePointer(0), MAGIC_STRUCT.size))[0]
+        return self._slice_magic
 
     def verify_magic(self) -> bool:
         """Ensure magic at beginning of Mach-O slice indicates a supported format
@@ -315,50 +372,61 @@ class MachoBinary:
             offset: Slice offset to first segment command
             ncmds: Number of load commands to parse, as declared by the header's ncmds field
         """
+        # Read the whole load commands region once, and decode each command's header from it in-memory
+        load_commands_off = offset
+        load_commands = self.get_bytes(offset, self._load_commands_end_addr - offset)
         for i in range(ncmds):
-            load_command = self.read_struct(offset, MachoLoadCommandStruct)
+            region_off = offset - load_commands_off
+            if region_off + _LOAD_COMMAND_HEADER.size <= len(load_commands):
+                cmd, cmdsize = _LOAD_COMMAND_HEADER.unpack_from(load_commands, region_off)
+            else:
+                # ncmds may describe commands beyond sizeofcmds, such as while insert_load_dylib_cmd() is
+                # partway through updating the header. Read these directly from the binary
+                cmd, cmdsize = _LOAD_COMMAND_HEADER.unpack(self.get_bytes(offset, _LOAD_COMMAND_HEADER.size))
 
-            if load_command.cmd in [MachoLoadCommands.LC_SEGMENT, MachoLoadCommands.LC_SEGMENT_64]:
+            if cmd in (MachoLoadCommands.LC_SEGMENT, MachoLoadCommands.LC_SEGMENT_64):
                 segment_command = self.read_struct(offset, MachoSegmentCommandStruct)
                 # TODO(PT) handle byte swap of segment if necessary
                 segment = MachoSegment(segment_command)
                 self.segments.append(segment)
-                self._parse_sections_for_segment(segment, offset)
+                self._segments_by_name.setdefault(segment.name, segment)
+                self._segments_with_unparsed_sections.append((segment, offset))
+                segment._unparsed_sections_owner = weakref.ref(self)
 
             # some commands have their own structure that we interpret separately from a normal load command
             # if we want to interpret more commands in the future, this is the place to do it
-            elif load_command.cmd in [MachoLoadCommands.LC_ENCRYPTION_INFO, MachoLoadCommands.LC_ENCRYPTION_INFO_64]:
+            elif cmd in (MachoLoadCommands.LC_ENCRYPTION_INFO, MachoLoadCommands.LC_ENCRYPTION_INFO_64):
                 self._encryption_info = self.read_struct(offset, MachoEncryptionInfoStruct)
 
-            elif load_command.cmd == MachoLoadCommands.LC_SYMTAB:
+            elif cmd == MachoLoadCommands.LC_SYMTAB:
                 self._symtab = self.read_struct(offset, MachoSymtabCommandStruct)
 
-            elif load_command.cmd == MachoLoadCommands.LC_DYSYMTAB:
+            elif cmd == MachoLoadCommands.LC_DYSYMTAB:
                 self._dysymtab = self.read_struct(offset, MachoDysymtabCommandStruct)
 
-            elif load_command.cmd in [MachoLoadCommands.LC_DYLD_INFO, MachoLoadCommands.LC_DYLD_INFO_ONLY]:
+            elif cmd in (MachoLoadCommands.LC_DYLD_INFO, MachoLoadCommands.LC_DYLD_INFO_ONLY):
                 self._dyld_info = self.read_struct(offset, MachoDyldInfoCommandStruct)
 
-            elif load_command.cmd in [MachoLoadCommands.LC_DYLD_EXPORTS_TRIE]:
+            elif cmd == MachoLoadCommands.LC_DYLD_EXPORTS_TRIE:
                 self._dyld_export_trie = self.read_struct(offset, MachoLinkeditDataCommandStruct)
 
-            elif load_command.cmd in [MachoLoadCommands.LC_DYLD_CHAINED_FIXUPS]:
+            elif cmd == MachoLoadCommands.LC_DYLD_CHAINED_FIXUPS:
                 self._dyld_chained_fixups = self.read_struct(offset, MachoLinkeditDataCommandStruct)
 
-            elif load_command.cmd in [MachoLoadCommands.LC_LOAD_DYLIB, MachoLoadCommands.LC_LOAD_WEAK_DYLIB]:
+            elif cmd in (MachoLoadCommands.LC_LOAD_DYLIB, MachoLoadCommands.LC_LOAD_WEAK_DYLIB):
                 dylib_load_command = self.read_struct(offset, DylibCommandStruct)
                 dependent_library_info = DynamicLibrary(self, dylib_load_command)
                 if dependent_library_info.name == DynamicLibrary.UNKNOWN_NAME:
                     logger.warning(f"Could not read name of LC_LOAD_(WEAK_)DYLIB command at index {i}, offset {offset}")
                 self.linked_dylibs.append(dependent_library_info)
 
-            elif load_command.cmd == MachoLoadCommands.LC_CODE_SIGNATURE:
+            elif cmd == MachoLoadCommands.LC_CODE_SIGNATURE:
                 self._code_signature_cmd = self.read_struct(offset, MachoLinkeditDataCommandStruct)
 
-            elif load_command.cmd == MachoLoadCommands.LC_FUNCTION_STARTS:
+            elif cmd == MachoLoadCommands.LC_FUNCTION_STARTS:
                 self._function_starts_cmd = self.read_struct(offset, MachoLinkeditDataCommandStruct)
 
-            elif load_command.cmd == MachoLoadCommands.LC_ID_DYLIB:
+            elif cmd == MachoLoadCommands.LC_ID_DYLIB:
                 id_dylib_command = self.read_struct(offset, DylibCommandStruct)
                 self.id_dylib = DynamicLibrary(self, id_dylib_command)
                 if self.id_dylib.name == DynamicLibrary.UNKNOWN_NAME:
@@ -366,7 +434,7 @@ class MachoBinary:
                 # This load command should only be present for dylibs. Validate this assumption
                 assert self.file_type == MachoFileType.MH_DYLIB
 
-            elif load_command.cmd == MachoLoadCommands.LC_BUILD_VERSION:
+            elif cmd == MachoLoadCommands.LC_BUILD_VERSION:
                 self._build_version_cmd = self.read_struct(offset, MachoBuildVersionCommandStruct)
                 # Parse the build tool versions following this structure
                 build_tool_offset = offset + self._build_version_cmd.sizeof
@@ -376,7 +444,7 @@ class MachoBinary:
                     self._build_tool_versions.append(build_tool_version)
 
             # move to next load command in header
-            offset += load_command.cmdsize
+            offset += cmdsize
 
     def read_struct(self, binary_offset: int, struct_type: Type[AIS], virtual: bool = False) -> AIS:
         """Given a binary offset, return the structure it describes.
@@ -408,15 +476,20 @@ class MachoBinary:
         base_virt_offset = binary_offset
         if not virtual:
             base_virt_offset += self.get_virtual_base()
-        for field_name, field_type, *_ in backing_layout._fields_:
-            field_offset = getattr(getattr(backing_layout, field_name), "offset")
+        rebased_pointers = self.dyld_rebased_pointers
+        if not rebased_pointers:
+            # Pre-iOS 15 binaries don't record rebases, so there is nothing to apply
+            return s
+
+        for field_name, field_offset in _pointer_field_offsets(backing_layout):
             field_address = base_virt_offset + field_offset
-            if field_type == c_uint64 and field_address in self.dyld_rebased_pointers:
+            rebased_pointer = rebased_pointers.get(VirtualMemoryPointer(field_address))
+            if rebased_pointer is not None:
                 logger.debug(
                     f"Setting rebased pointer within {struct_type}+{field_offset} -> "
-                    f"{self.dyld_rebased_pointers[field_address]} at {field_address}"
+                    f"{rebased_pointer} at {field_address}"
                 )
-                setattr(s, field_name, self.dyld_rebased_pointers[field_address])
+                setattr(s, field_name, rebased_pointer)
 
         return s
 
@@ -433,20 +506,39 @@ class MachoBinary:
         if virt_addr < self.get_virtual_base():
             return None
 
-        # if the address given is past the last declared section, translate based on the last section
-        # so, we need to keep track of the last seen section
-        max_section = next(iter(self.sections))
+        sections = self.sections
+        if not sections:
+            return None
+
+        if self._sections_by_address is None:
+            self._build_section_address_index()
+        assert self._sections_by_address is not None and self._max_section is not None
 
-        for idx, section in enumerate(self.sections):
-            # update highest section
-            if section.address > max_section.address:
-                max_section = section
+        if self._sections_overlap:
+            # Return the first section in the header which contains the address
+            for section in sections:
+                if section.address <= virt_addr < section.end_address:
+                    return section
+        else:
+            # The sections don't overlap, so only the last section starting at or before the address can contain it
+            idx = bisect_right(self._section_start_addresses, virt_addr) - 1
+            if idx >= 0 and virt_addr < self._sections_by_address[idx].end_address:
+                return self._sections_by_address[idx]
 
-            if section.address <= virt_addr < section.end_address:
-                return section
         # we looked through all sections and didn't find one explicitly containing this address
-        # guess by using the highest-addressed section we've seen
-        return max_section
+        # guess by using the highest-addressed section
+        return self._max_section
+
+    def _build_section_address_index(self) -> None:
+        """Sort the binary's sections by address, so that section_for_address() can binary search them."""
+        # Ties are broken by header order, so the first of several highest-addressed sections is the fallback
+        self._max_section = max(self.sections, key=lambda s: s.address)
+        # Empty sections can never contain an address
+        self._sections_by_address = sorted((s for s in self.sections if s.size), key=lambda s: s.address)
+        self._section_start_addresses = [s.address for s in self._sections_by_address]
+        self._sections_overlap = any(
+            section.address < prev_section.end_address for prev_section, section in pairwise(self._sections_by_address)
+        )
 
     def segment_for_index(self, segment_index: int) -> MachoSegment:
         if 0 <= segment_index < len(self.segments):
@@ -458,16 +550,28 @@ class MachoBinary:
     def segment_with_name(self, desired_segment_name: str) -> Optional[MachoSegment]:
         """Returns the segment with the provided name. Returns None if there's no such segment in the binary."""
         # TODO(PT): add unit test for this method
-        return next((s for s in self.segments if s.name == desired_segment_name), None)
+        return self._segments_by_name.get(desired_segment_name)
 
     def section_with_name(self, desired_section_name: str, parent_segment_name: str) -> Optional[MachoSection]:
         """Retrieve the section with the provided name which is contained within the provided segment.
         Returns None if no such section exists.
         """
-        segment = self.segment_with_name(parent_segment_name)
-        if segment:
-            return next((s for s in segment.sections if s.name == desired_section_name), None)
-        return None
+        self._parse_pending_sections()
+        return self._sections_by_name.get((parent_segment_name, desired_section_name))
+
+    @property
+    def sections(self) -> List[MachoSection]:
+        """Every section within the binary, in the order of the segment commands which contain them.
+        Section headers are parsed on first access.
+        """
+        self._parse_pending_sections()
+        return self._sections
+
+    def _parse_pending_sections(self) -> None:
+        """Parse the section headers of every segment whose sections haven't been read yet."""
+        while self._segments_with_unparsed_sections:
+            segment, segment_offset = self._segments_with_unparsed_sections.pop(0)
+            self._parse_sections_for_segment(segment, segment_offset)
 
     def _parse_sections_for_segment(self, segment: MachoSegment, segment_offset: StaticFilePointer) -> None:
         """Parse all sections contained within a Mach-O segment, and add them to our list of sections
@@ -476,6 +580,7 @@ class MachoBinary:
             segment: The segment command whose sections should be read
             segment_offset: The offset within the file that the segment command is located at
         """
+        segment._unparsed_sections_owner = None
         if not segment.section_count:
             return
 
@@ -487,9 +592,12 @@ class MachoBinary:
             section_command = self.read_struct(section_offset, MachoSectionRawStruct)
             # Encapsulate header and content into one object, and store that
             section = MachoSection(section_command, segment)
-            segment.sections.append(section)
+            segment._sections.append(section)
             # Add to list of sections within the Mach-O
-            self.sections.append(section)
+            self._sections.append(section)
+            # Only sections of the first segment with a given name are reachable by name, as in segment_with_name()
+            if self._segments_by_name[segment.name] is segment:
+                self._sections_by_name.setdefault((segment.name, section.name), section)
 
             # Iterate to next section in list
             section_offset += section_command.sizeof
@@ -650,7 +758,7 @@ class MachoBinary:
         This method will return None if the specified address does not point to a UTF-8 encoded string
         """
         max_len = 16
-        symbol_name_characters = []
+        symbol_name_bytes = bytearray()
         found_null_terminator = False
 
         while not found_null_terminator:
@@ -659,11 +767,10 @@ class MachoBinary:
             else:
                 name_bytes = self.get_bytes(StaticFilePointer(start_address), max_len)
             # search for null terminator in this content
-            for ch in name_bytes:
-                if ch == 0x00:
-                    found_null_terminator = True
-                    break
-                symbol_name_characters.append(ch)
+            null_idx = name_bytes.find(0)
+            found_null_terminator = null_idx != -1
+            # accumulate the raw bytes, and only decode once the full string has been read
+            symbol_name_bytes += name_bytes[:null_idx] if found_null_terminator else name_bytes
 
             # do we need to keep searching for the end of the symbol name?
             if not found_null_terminator:
@@ -674,7 +781,7 @@ class MachoBinary:
             else:
                 # read full string!
                 try:
-                    symbol_name = bytearray(symbol_name_characters).decode()
+                    symbol_name = symbol_name_bytes.decode()
                     return symbol_name
                 except UnicodeDecodeError:
                     # if decoding the string failed, we may have been passed an address which does not actually
@@ -771,7 +878,15 @@ class MachoBinary:
 
         The indexes of these two lists are matched up; that is, list1[0] is the virtual address of the first pointer
         in the requested section, and list2[0] is the pointer value contained at that address.
+
+        The section is only decoded once, and the same map is returned on subsequent calls.
+        Callers must not modify it.
         """
+        if section_name not in self._pointer_sections:
+            self._pointer_sections[section_name] = self._read_pointer_section(section_name)
+        return self._pointer_sections[section_name]
+
+    def _read_pointer_section(self, section_name: str) -> Dict[VirtualMemoryPointer, VirtualMemoryPointer]:
         # PT: Assume a pointer-list-section will always be in __DATA or __DATA_CONST. True as far as I know.
         for segment in ["__DATA", "__DATA_CONST"]:
             section = self.section_with_name(section_name, segment)
@@ -786,28 +901,20 @@ class MachoBinary:
         section_base = section.address
         section_data = self.get_bytes(section.offset, section.size)
 
-        binary_word = self.platform_word_type
-        pointer_count = int(len(section_data) / sizeof(binary_word))
-        pointer_off = 0
+        word_size = sizeof(self.platform_word_type)
+        pointer_count = len(section_data) // word_size
+        # Decode every pointer in the section in one pass, rather than building a ctypes word for each entry
+        raw_pointers = iter_unpack("<Q" if self.is_64bit else "<I", section_data[: pointer_count * word_size])
 
-        for i in range(pointer_count):
+        rebased_pointers = self.dyld_rebased_pointers
+        for i, (raw_pointer,) in enumerate(raw_pointers):
             # convert section offset of entry to absolute virtual address
-            ptr_location = VirtualMemoryPointer(section_base + pointer_off)
-
-            if ptr_location in self.dyld_rebased_pointers:
-                ptr_value = self.dyld_rebased_pointers[ptr_location]
-                logger.debug(f"Pointer is rebased: {ptr_location} -> {ptr_value}")
-            else:
-                data_end = pointer_off + sizeof(binary_word)
-                ptr_value = VirtualMemoryPointer(
-                    binary_word.from_buffer(bytearray(section_data[pointer_off:data_end])).value
-                )
-                logger.debug(f"Pointer was not in the rebase list: {ptr_location} -> {ptr_value}")
-
-            address_to_pointer_map[ptr_location] = VirtualMemoryPointer(ptr_value)
-
-            pointer_off += sizeof(binary_word)
+            ptr_location = VirtualMemoryPointer(section_base + (i * word_size))
+            # Prefer the rebased value if dyld would have slid this pointer
+            ptr_value = rebased_pointers.get(ptr_location)
+            address_to_pointer_map[ptr_location] = VirtualMemoryPointer(raw_pointer if ptr_value is None else ptr_value)
 
+        logger.debug(f"Read {pointer_count} pointers from {section_name}")
         return address_to_pointer_map
 
     def read_word(self, address: int, virtual: bool = True, word_type: Any = None) -> int:
@@ -823,17 +930,18 @@ class MachoBinary:
         if not file_bytes:
             raise InvalidAddressError(f"Could not read word at address {hex(address)}")
 
-        return word_type.from_buffer(bytearray(file_bytes)).value
+        return word_type.from_buffer_copy(file_bytes).value
 
     def read_rebased_pointer(self, address: VirtualMemoryPointer) -> VirtualMemoryPointer:
         """Attempt to read a rebased pointer from the binary at a virtual address.
         The pointer is assumed to be the platform word size.
         """
-        if address not in self.dyld_rebased_pointers:
+        rebased_pointer = self.dyld_rebased_pointers.get(address)
+        if rebased_pointer is None:
             # This may be a pre-iOS 15 binary for which we don't record rebases
             return VirtualMemoryPointer(self.read_word(address, virtual=True, word_type=self.platform_word_type))
 
-        return self.dyld_rebased_pointers[address]
+        return rebased_pointer
 
     @property
     def header(self) -> MachoHeaderStruct:
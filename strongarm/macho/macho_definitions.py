@@ -67,6 +67,10 @@ class MachArch(IntEnum):
     DYLD_SHARED_CACHE_MAGIC = 0x646C7964  # b'dyld'
 
 
+# The 32-bit magic at the start of a Mach-O, FAT archive or dyld_shared_cache
+MAGIC_STRUCT = struct.Struct("<I")
+
+
 class VMProtFlags(IntEnum):
     # https://opensource.apple.com/source/xnu/xnu-1504.7.4/osfmk/mach/vm_prot.h.auto.html
     VM_PROT_NONE = 0 << 0
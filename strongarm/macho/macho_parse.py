@@ -1,9 +1,18 @@
-from ctypes import c_uint32, sizeof
+import mmap
+from ctypes import sizeof
 from pathlib import Path
-from typing import List, Optional
+from types import TracebackType
+from typing import List, Optional, Type
 
 from strongarm.macho.macho_binary import MachoBinary
-from strongarm.macho.macho_definitions import MachArch, MachoFatArch, MachoFatHeader, StaticFilePointer, swap32
+from strongarm.macho.macho_definitions import (
+    MAGIC_STRUCT,
+    MachArch,
+    MachoFatArch,
+    MachoFatHeader,
+    StaticFilePointer,
+    swap32,
+)
 
 
 class ArchitectureNotSupportedError(Exception):
@@ -11,22 +20,48 @@ class ArchitectureNotSupportedError(Exception):
 
 
 class MachoParser:
-    _FAT_MAGIC = [MachArch.FAT_MAGIC, MachArch.FAT_CIGAM]
-    _MACHO_MAGIC = [MachArch.MH_MAGIC, MachArch.MH_CIGAM, MachArch.MH_MAGIC_64, MachArch.MH_CIGAM_64]
-    _BIG_ENDIAN_MAG = [MachArch.FAT_CIGAM, MachArch.MH_CIGAM, MachArch.MH_CIGAM_64]
+    _FAT_MAGIC = frozenset((MachArch.FAT_MAGIC, MachArch.FAT_CIGAM))
+    _MACHO_MAGIC = frozenset((MachArch.MH_MAGIC, MachArch.MH_CIGAM, MachArch.MH_MAGIC_64, MachArch.MH_CIGAM_64))
+    _BIG_ENDIAN_MAG = frozenset((MachArch.FAT_CIGAM, MachArch.MH_CIGAM, MachArch.MH_CIGAM_64))
 
     _SUPPORTED_SLICE_MAG = MachoBinary.SUPPORTED_MAG
 
-    SUPPORTED_MAG = _FAT_MAGIC + _SUPPORTED_SLICE_MAG
+    SUPPORTED_MAG = _FAT_MAGIC | _SUPPORTED_SLICE_MAG
 
     def __init__(self, path: Path) -> None:
         self.path = path
+        # Map the file rather than reopening it for each of the FAT, magic and header reads below.
+        # The mapping holds its own reference to the file, so the file object itself isn't needed past this point
+        with open(self.path, "rb") as binary_file:
+            self._mmap = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
 
         self.header: Optional[MachoFatHeader] = None
         self.is_swapped: bool = False
         self.slices: List[MachoBinary] = []
 
-        self.parse()
+        try:
+            self.parse()
+        except BaseException:
+            # Don't leave the file mapped if the input couldn't be parsed
+            self.close()
+            raise
+
+    def __enter__(self) -> "MachoParser":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the file mapping backing this parser.
+        Slices which have already been parsed remain usable, as each holds its own copy of its bytes.
+        """
+        self._mmap.close()
 
     def get_arm64_slice(self) -> Optional[MachoBinary]:
         """Retrieve the parsed slice from the FAT built for ARM64."""
@@ -70,6 +105,8 @@ class MachoParser:
         if not self._check_is_macho_header(fileoff):
             raise RuntimeError(f"Parsing error: data at file offset {hex(int(fileoff))} was not a valid Mach-O slice!")
 
+        # Hand the slice its own copy of its bytes, rather than a view of the mapping, so it doesn't depend on the
+        # file staying open (or unchanged on disk) for as long as the slice is alive
         slice_data = self.get_bytes(fileoff, slice_size)
         attempt = MachoBinary(self.path, slice_data, file_offset=fileoff)
 
@@ -88,8 +125,7 @@ class MachoParser:
 
         # start reading from the start of the file
         read_off = 0
-        header_bytes = bytearray(self.get_bytes(StaticFilePointer(read_off), sizeof(MachoFatHeader)))
-        self.header = MachoFatHeader.from_buffer(header_bytes)
+        self.header = MachoFatHeader.from_buffer_copy(self._mmap, read_off)
         # first fat_arch structure is directly after FAT header
         read_off += sizeof(MachoFatHeader)
 
@@ -98,8 +134,7 @@ class MachoParser:
             self.header.nfat_arch = swap32(self.header.nfat_arch)  # type: ignore
 
         for i in range(self.header.nfat_arch):  # type: ignore
-            arch_bytes = self.get_bytes(StaticFilePointer(read_off), sizeof(MachoFatArch))
-            fat_arch = MachoFatArch.from_buffer(bytearray(arch_bytes))
+            fat_arch = MachoFatArch.from_buffer_copy(self._mmap, read_off)
 
             # do we need to byte swap?
             # TODO(pt): come up with more elegant mechanism for swapping byte order in every word of Structure
@@ -132,7 +167,7 @@ class MachoParser:
             False if the magic is anything else
 
         """
-        magic = c_uint32.from_buffer(bytearray(self.get_bytes(offset, sizeof(c_uint32)))).value
+        magic = MAGIC_STRUCT.unpack_from(self._mmap, offset)[0]
         return magic in MachoParser._MACHO_MAGIC
 
     def is_magic_supported(self) -> bool:
@@ -150,7 +185,7 @@ class MachoParser:
     @property
     def file_magic(self) -> int:
         """Read file magic."""
-        return c_uint32.from_buffer(bytearray(self.get_bytes(StaticFilePointer(0), sizeof(c_uint32)))).value
+        return MAGIC_STRUCT.unpack_from(self._mmap, 0)[0]
 
     @property
     def is_fat(self) -> bool:
@@ -185,6 +220,4 @@ class MachoParser:
             Byte list representing contents of file at provided address
 
         """
-        with open(self.path, "rb") as binary_file:
-            binary_file.seek(offset)
-            return binary_file.read(size)
+        return self._mmap[offset : offset + size]
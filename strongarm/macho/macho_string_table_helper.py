@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 from strongarm.macho.macho_binary import MachoBinary, VirtualMemoryPointer
 from strongarm.macho.macho_definitions import NLIST_NTYPE, NTYPE_VALUES
@@ -23,13 +23,17 @@ class MachoStringTableHelper:
 
     def __init__(self, binary: MachoBinary) -> None:
         self.binary = binary
-        self.string_table_entries = MachoStringTableHelper.transform_string_section(self.binary.get_raw_string_table())
+        # Hand the string table's bytes straight through, rather than via get_raw_string_table()'s List[int]
+        symtab = self.binary.symtab
+        self.string_table_entries = MachoStringTableHelper.transform_string_section(
+            self.binary.get_bytes(symtab.stroff, symtab.strsize)
+        )
         self.imported_symbols: List[str] = []
         self.exported_symbols: Dict[VirtualMemoryPointer, str] = {}
         self.parse_sym_lists()
 
     @classmethod
-    def transform_string_section(cls, strtab: List[int]) -> Dict[int, MachoStringTableEntry]:
+    def transform_string_section(cls, strtab: Union[bytes, bytearray, List[int]]) -> Dict[int, MachoStringTableEntry]:
         """Create more efficient representation of string table data
 
         Often, tables in a Mach-O will reference data within the string table.
@@ -46,26 +50,21 @@ class MachoStringTableHelper:
         """
         string_table_entries = {}
         entry_start_idx = 0
-        for idx, ch in enumerate(strtab):
-            # end of current string?
-            if ch == 0x00:
-                length = idx - entry_start_idx
-
-                # read this string now that we know the start index and length
-                entry_end_idx = entry_start_idx + length
-                entry_byte_content = bytearray(strtab[entry_start_idx:entry_end_idx:])
-                try:
-                    entry_content = entry_byte_content.decode("utf-8")
-                except UnicodeDecodeError:
-                    # get a string literal of the raw bytes. 0x0080 -> "b'\\x00\\x80'"
-                    entry_content = str(bytes(entry_byte_content))
-
-                # record in list
-                ent = MachoStringTableEntry(entry_start_idx, length, entry_content)
-                string_table_entries[entry_start_idx] = ent
-
-                # move to starting index of next string
-                entry_start_idx = idx + 1
+        # Let bytes.split() find every NULL terminator in one pass, rather than inspecting each character in Python.
+        # The final element holds any data after the last NULL, which isn't a terminated entry
+        for entry_byte_content in bytes(strtab).split(b"\x00")[:-1]:
+            try:
+                entry_content = entry_byte_content.decode("utf-8")
+            except UnicodeDecodeError:
+                # get a string literal of the raw bytes. 0x0080 -> "b'\\x00\\x80'"
+                entry_content = str(entry_byte_content)
+
+            # record in list
+            length = len(entry_byte_content)
+            string_table_entries[entry_start_idx] = MachoStringTableEntry(entry_start_idx, length, entry_content)
+
+            # move to starting index of next string
+            entry_start_idx += length + 1
         return string_table_entries
 
     def string_table_entry_for_strtab_index(self, start_idx: int) -> Optional[MachoStringTableEntry]:
@@ -74,9 +73,7 @@ class MachoStringTableHelper:
         Returns:
             A MachoStringTableEntry if provided index was the starting character of a string table entry, None if not
         """
-        if start_idx in self.string_table_entries:
-            return self.string_table_entries[start_idx]
-        return None
+        return self.string_table_entries.get(start_idx)
 
     def parse_sym_lists(self) -> None:
         """Read imported and exported symbol names referenced by symtab from the string table."""
@@ -107,6 +104,4 @@ class MachoStringTableHelper:
 
     def get_symbol_name_for_address(self, address: VirtualMemoryPointer) -> Optional[str]:
         """For an address of a function entrypoint, return the function's symbol name."""
-        if address in self.exported_symbols:
-            return self.exported_symbols[address]
-        return None
+        return self.exported_symbols.get(address)
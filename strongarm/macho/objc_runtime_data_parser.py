@@ -147,6 +147,8 @@ class ObjcRuntimeDataParser:
         self._selref_ptr_to_selref_map: Dict[VirtualMemoryPointer, ObjcSelref] = {}
         # Note this mapping is partially filled in now, but gets updated later in the parse
         self._selref_ptr_to_selector_map: Dict[VirtualMemoryPointer, ObjcSelector] = {}
+        # Inverse of the above, keyed by selector name. Built on first use, once the parse is complete
+        self._selector_names_to_selrefs: Optional[Dict[str, VirtualMemoryPointer]] = None
         # Populates the mappings above
         self._parse_selrefs()
 
@@ -192,9 +194,7 @@ class ObjcRuntimeDataParser:
         return syms_to_dylib_path
 
     def path_for_external_symbol(self, symbol: str) -> Optional[str]:
-        if symbol in self._sym_to_dylib_path:
-            return self._sym_to_dylib_path[symbol]
-        return None
+        return self._sym_to_dylib_path.get(symbol)
 
     def _parse_selrefs(self) -> None:
         """Parse the binary's selref list, and store the data.
@@ -253,10 +253,12 @@ class ObjcRuntimeDataParser:
         return self._selref_ptr_to_selector_map
 
     def selref_for_selector_name(self, selector_name: str) -> Optional[VirtualMemoryPointer]:
-        return next(
-            (selref for selref, selector in self._selref_ptr_to_selector_map.items() if selector.name == selector_name),
-            None,
-        )
+        if self._selector_names_to_selrefs is None:
+            self._selector_names_to_selrefs = {}
+            for selref, selector in self._selref_ptr_to_selector_map.items():
+                # If several selrefs share a name, return the first one, as the previous linear search did
+                self._selector_names_to_selrefs.setdefault(selector.name, selref)
+        return self._selector_names_to_selrefs.get(selector_name)
 
     def get_method_imp_addresses(self, selector: str) -> List[VirtualMemoryPointer]:
         """Given a selector, return a list of virtual addresses corresponding to the start of each IMP for that SEL."""
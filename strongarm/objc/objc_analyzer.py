@@ -1,5 +1,6 @@
 import functools
 import shlex
+from bisect import bisect_right
 from itertools import starmap
 from subprocess import check_output
 from typing import List, Optional
@@ -15,10 +16,12 @@ from .objc_instruction import ObjcBranchInstruction, ObjcInstruction, ObjcUncond
 
 logger = strongarm_logger.getChild(__file__)
 
+_MANGLED_CPP_SYMBOL_PREFIXES = ("_Z", "__Z", "___Z")
+
 
 def _is_mangled_cpp_symbol(symbol_name: str) -> bool:
     """Return whether a symbol name appears to be a mangled C++ symbol."""
-    return any(symbol_name.startswith(prefix) for prefix in ["_Z", "__Z", "___Z"])
+    return symbol_name.startswith(_MANGLED_CPP_SYMBOL_PREFIXES)
 
 
 def _demangle_cpp_symbol(cpp_symbol: str) -> str:
@@ -30,14 +33,10 @@ def _demangle_cpp_symbol(cpp_symbol: str) -> str:
 
     # Linux's c++filt doesn't like the clang-specific "_block_invoke" which is tacked onto ObjC++ blocks.
     # Trim this off and add it back after demangling the symbol
-    is_block = False
-    block_index = ""
-    if "_block_invoke" in cpp_symbol:
-        is_block = True
-        cpp_symbol, block_index_str = cpp_symbol.split("_block_invoke")
-        # Some blocks have an index
-        if block_index_str.isnumeric():
-            block_index = f" {int(block_index_str)}"
+    cpp_symbol, block_marker, block_index_str = cpp_symbol.partition("_block_invoke")
+    is_block = bool(block_marker)
+    # Some blocks have an index
+    block_index = f" {int(block_index_str)}" if block_index_str.isnumeric() else ""
 
     # XXX(PT): We observe that c++filt doesn't work if there are too many leading underscores
     # Try demangling multiple times, trimming a leading underscore each time until success (up to 3 times)
@@ -114,6 +113,10 @@ class ObjcFunctionAnalyzer:
 
         # Find basic-block-boundaries upfront
         self.basic_blocks = self._find_basic_blocks()
+        # Start addresses of self.basic_blocks, used to find the block containing an instruction with a binary search
+        self._basic_block_starts = [bb.start_address for bb in self.basic_blocks]
+        # The function's bytecode is read once, then sliced for each dataflow query
+        self._bytecode: Optional[bytearray] = None
 
     def _get_instruction_index_of_address(self, address: VirtualMemoryPointer) -> Optional[int]:
         """Return the index of an instruction with a provided address within the internal list of instructions."""
@@ -330,12 +333,11 @@ class ObjcFunctionAnalyzer:
     def get_register_contents_at_instruction(self, register: str, instruction: ObjcInstruction) -> RegisterContents:
         # If basic-block analysis has been done, reduce the dataflow analysis space to the instruction's basic-block
         # Otherwise, use the entire source function as the search space
-        for bb in self.basic_blocks:
-            if bb.start_address <= instruction.address < bb.end_address:
-                # Found the basic block containing the instruction; reduce dataflow analysis space to its head
-                dataflow_space_start = bb.start_address
-                dataflow_space_end = bb.end_address
-                break
+        bb_idx = bisect_right(self._basic_block_starts, instruction.address) - 1
+        if bb_idx >= 0 and instruction.address < self.basic_blocks[bb_idx].end_address:
+            # Found the basic block containing the instruction; reduce dataflow analysis space to its head
+            dataflow_space_start = self.basic_blocks[bb_idx].start_address
+            dataflow_space_end = self.basic_blocks[bb_idx].end_address
         else:
             # We are in the process of computing basic blocks, so we can't query them. Use the whole function for DFA
             dataflow_space_start = self.start_address
@@ -343,13 +345,20 @@ class ObjcFunctionAnalyzer:
 
         # To try and save a bit of work, don't include bytecode past the end of this basic block,
         # as we only need the bytecode up to the provided instruction
-        function_bytecode = self.binary.get_content_from_virtual_address(
-            self.start_address, dataflow_space_end - self.start_address
-        )
+        function_bytecode = self._get_bytecode_up_to(dataflow_space_end)
         return get_register_contents_at_instruction_fast(
             register, self.start_address, function_bytecode, dataflow_space_start, instruction.address
         )
 
+    def _get_bytecode_up_to(self, end_address: VirtualMemoryPointer) -> bytearray:
+        """Return the function's bytecode from its entry point up to the provided (exclusive) end address."""
+        size = end_address - self.start_address
+        if self._bytecode is None or len(self._bytecode) < size:
+            # Read the whole function at once, so later queries within it don't need to go back to the binary
+            read_size = max(size, self.end_address - self.start_address)
+            self._bytecode = self.binary.get_content_from_virtual_address(self.start_address, read_size)
+        return self._bytecode[:size]
+
     def _find_basic_blocks(self) -> List["BasicBlock"]:
         """Locate the basic-block-boundaries within the source function.
         A 'basic block' is a unit of assembly code with no branching except for the last instruction.
@@ -360,7 +369,7 @@ class ObjcFunctionAnalyzer:
             a List of objects encapsulating the basic block boundaries.
         """
         basic_blocks = self.macho_analyzer.get_basic_block_boundaries(self.start_address)
-        return list(starmap(BasicBlock, basic_blocks))
+        return list(starmap(BasicBlock, sorted(basic_blocks)))
 
     def __repr__(self) -> str:
         return f"({self.get_symbol_name()} @ {self.start_address})"
@@ -1,9 +1,8 @@
-from typing import TYPE_CHECKING, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
 
 from capstone import CsInsn
 from capstone.arm64 import ARM64_OP_IMM, ARM64_OP_MEM, ARM64_OP_REG, Arm64Op
 
-from strongarm.macho.macho_analyzer import MachoAnalyzer
 from strongarm.macho.macho_definitions import VirtualMemoryPointer
 from strongarm.macho.objc_runtime_data_parser import ObjcSelector, ObjcSelref
 
@@ -13,6 +12,8 @@ if TYPE_CHECKING:
 
 class ObjcInstruction:
     VECTOR_REGISTER_PREFIXES = ["d", "s", "v"]
+    # Capstone register IDs are stable for the architecture, so each one only needs to be classified once
+    _REGISTER_IDS_TO_IS_VECTOR: Dict[int, bool] = {}
 
     def __init__(self, instruction: CsInsn) -> None:
         self.raw_instr = instruction
@@ -38,12 +39,17 @@ class ObjcInstruction:
             return False
 
         if operand.type == ARM64_OP_REG:
-            reg_name = instruction.reg_name(operand.value.reg)
+            reg_id = operand.value.reg
         elif operand.type == ARM64_OP_MEM:
-            reg_name = instruction.reg_name(operand.mem.base)
+            reg_id = operand.mem.base
         else:
             raise RuntimeError(f"unknown operand type {operand.type} in instr at {instruction.address}")
-        return ObjcInstruction.is_vector_register(reg_name)
+
+        is_vector = ObjcInstruction._REGISTER_IDS_TO_IS_VECTOR.get(reg_id)
+        if is_vector is None:
+            is_vector = ObjcInstruction.is_vector_register(instruction.reg_name(reg_id))
+            ObjcInstruction._REGISTER_IDS_TO_IS_VECTOR[reg_id] = is_vector
+        return is_vector
 
     @classmethod
     def instruction_uses_vector_registers(cls, instruction: CsInsn) -> bool:
@@ -104,30 +110,29 @@ class ObjcBranchInstruction(ObjcInstruction):
     def is_branch_instruction(cls, instruction: CsInsn) -> bool:
         """Returns True if the CsInsn represents a branch instruction, False otherwise."""
         # TODO(FS): Merge subclasses into ObjcBranchInstruction and provide contextual information about each variant
-        return (
-            instruction.mnemonic in ObjcUnconditionalBranchInstruction.UNCONDITIONAL_BRANCH_MNEMONICS
-            or instruction.mnemonic in ObjcConditionalBranchInstruction.CONDITIONAL_BRANCH_MNEMONICS
-        )
+        return instruction.mnemonic in _BRANCH_MNEMONICS
 
 
 class ObjcUnconditionalBranchInstruction(ObjcBranchInstruction):
-    UNCONDITIONAL_BRANCH_MNEMONICS = [
-        "b",
-        "bl",
-        "bx",
-        "blx",
-        "bxj",
-        "b.eq",  # TODO(PT): these b-suffix are not strictly unconditional branches, but
-        # they're functionally unconditional for what we care about
-        "b.ne",
-        "b.ge",
-        "b.le",
-        "b.gt",
-        "b.lt",
-        "b.hi",
-        "b.lo",
-    ]
-    OBJC_MSGSEND_FUNCTIONS = ["_objc_msgSend", "_objc_msgSendSuper2"]
+    UNCONDITIONAL_BRANCH_MNEMONICS = frozenset(
+        [
+            "b",
+            "bl",
+            "bx",
+            "blx",
+            "bxj",
+            "b.eq",  # TODO(PT): these b-suffix are not strictly unconditional branches, but
+            # they're functionally unconditional for what we care about
+            "b.ne",
+            "b.ge",
+            "b.le",
+            "b.gt",
+            "b.lt",
+            "b.hi",
+            "b.lo",
+        ]
+    )
+    OBJC_MSGSEND_FUNCTIONS = frozenset(["_objc_msgSend", "_objc_msgSendSuper2"])
 
     def __init__(
         self,
@@ -146,7 +151,8 @@ class ObjcUnconditionalBranchInstruction(ObjcBranchInstruction):
         self.selref: Optional[ObjcSelref] = None
         self.selector: Optional[ObjcSelector] = None
 
-        analyzer = MachoAnalyzer.get_analyzer(function_analyzer.binary)
+        # The function analyzer already holds the binary's shared MachoAnalyzer
+        analyzer = function_analyzer.macho_analyzer
 
         if container_function_boundary:
             if self.destination_address >= container_function_boundary[0]:
@@ -186,7 +192,7 @@ class ObjcUnconditionalBranchInstruction(ObjcBranchInstruction):
         # validate instruction
         if (
             not self.is_msgSend_call
-            or self.raw_instr.mnemonic not in ["bl", "b"]
+            or self.raw_instr.mnemonic not in ("bl", "b")
             or self.symbol not in self.OBJC_MSGSEND_FUNCTIONS
         ):
             raise ValueError(
@@ -221,24 +227,30 @@ class ObjcUnconditionalBranchInstruction(ObjcBranchInstruction):
 
 
 class ObjcConditionalBranchInstruction(ObjcBranchInstruction):
-    SINGLE_OP_MNEMONICS = ["cbz", "cbnz"]
-    DOUBLE_OP_MNEMONICS = ["tbnz"]
-    CONDITIONAL_BRANCH_MNEMONICS = SINGLE_OP_MNEMONICS + DOUBLE_OP_MNEMONICS
+    SINGLE_OP_MNEMONICS = frozenset(["cbz", "cbnz"])
+    DOUBLE_OP_MNEMONICS = frozenset(["tbnz"])
+    CONDITIONAL_BRANCH_MNEMONICS = SINGLE_OP_MNEMONICS | DOUBLE_OP_MNEMONICS
+    # Maps each conditional branch mnemonic to the index of the operand holding its destination
+    _DESTINATION_OPERAND_INDEXES = {
+        **{mnemonic: 1 for mnemonic in SINGLE_OP_MNEMONICS},
+        **{mnemonic: 2 for mnemonic in DOUBLE_OP_MNEMONICS},
+    }
 
     def __init__(self, function_analyzer: "ObjcFunctionAnalyzer", instruction: CsInsn) -> None:
-        if instruction.mnemonic not in ObjcConditionalBranchInstruction.CONDITIONAL_BRANCH_MNEMONICS:
+        # a conditional branch will either hold the destination in first or second operand, depending on mnemonic
+        dest_op_idx = ObjcConditionalBranchInstruction._DESTINATION_OPERAND_INDEXES.get(instruction.mnemonic)
+        if dest_op_idx is None:
             raise ValueError(
                 f"ObjcConditionalBranchInstruction instantiated with" f" invalid mnemonic {instruction.mnemonic}"
             )
 
-        # a conditional branch will either hold the destination in first or second operand, depending on mnemonic
-        if instruction.mnemonic in ObjcConditionalBranchInstruction.SINGLE_OP_MNEMONICS:
-            dest_op_idx = 1
-        elif instruction.mnemonic in ObjcConditionalBranchInstruction.DOUBLE_OP_MNEMONICS:
-            dest_op_idx = 2
-        else:
-            raise ValueError(f"Unknown conditional mnemonic {instruction.mnemonic}")
-
         ObjcBranchInstruction.__init__(
             self, instruction, VirtualMemoryPointer(instruction.operands[dest_op_idx].value.imm)
         )
+
+
+# Every mnemonic which ObjcBranchInstruction.parse_instruction knows how to handle
+_BRANCH_MNEMONICS = (
+    ObjcUnconditionalBranchInstruction.UNCONDITIONAL_BRANCH_MNEMONICS
+    | ObjcConditionalBranchInstruction.CONDITIONAL_BRANCH_MNEMONICS
+)
@@ -77,3 +77,13 @@ class TestDyldSharedCache:
             "_mach_init_routine": 0x1B7C574B0,
         }
         assert analyzer.exported_symbol_names_to_pointers == expected_exports
+
+    def test_embedded_binary_sections_available_after_close(self) -> None:
+        # Given I parse an embedded binary, and close the DSC parser once it's been retrieved
+        with DyldSharedCacheParser(_DSC_PATH) as dyld_shared_cache:
+            binary = dyld_shared_cache.get_embedded_binary(Path("/usr/lib/libSystem.B.dylib"))
+        # Then the binary's sections can still be looked up
+        text_section = binary.section_with_name("__text", "__TEXT")
+        assert text_section is not None
+        assert text_section in binary.sections
+        assert binary.section_for_address(VirtualMemoryPointer(text_section.address)) is text_section
@@ -270,6 +270,15 @@ class TestFunctionAnalyzer:
             # Then the code location returns the properly formatted symbol name
             assert self.function_analyzer.get_symbol_name() == "block 2 in test1()"
 
+    def test_demangle_nested_cpp_block(self) -> None:
+        # Given a function analyzer which represents an Objective-C block nested within another block in a C++ function
+        with mock.patch(
+            "strongarm.macho.MachoStringTableHelper.get_symbol_name_for_address",
+            return_value="___Z5test1v_block_invoke_block_invoke",
+        ):
+            # Then the symbol is split at the first block marker, and the code location names the source function
+            assert self.function_analyzer.get_symbol_name() == "block in test1()"
+
     def test_demangle_misleading_symbol(self) -> None:
         # Given a function analyzer which represents a symbol which looks like a mangled C++ symbol, but isn't one
         with mock.patch(
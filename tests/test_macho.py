@@ -1,4 +1,5 @@
 import pathlib
+from ctypes import sizeof
 from tempfile import TemporaryDirectory
 
 import pytest
@@ -6,10 +7,16 @@ import pytest
 from strongarm.macho import (
     CPU_TYPE,
     HEADER_FLAGS,
+    ArchitectureNotSupportedError,
     BinaryEncryptedError,
+    MachArch,
     MachoBinary,
+    MachoFileType,
+    MachoHeader64,
+    MachoLoadCommands,
     MachoParser,
     MachoSegmentCommand64,
+    MachoSymtabCommand,
     NoEmptySpaceForLoadCommandError,
     StaticFilePointer,
     VirtualMemoryPointer,
@@ -54,6 +61,49 @@ class TestMachoBinary:
         assert self.binary is not None
         assert self.binary.header is not None
 
+    @staticmethod
+    def _open_descriptors_for(path: pathlib.Path) -> int:
+        fd_dir = pathlib.Path("/proc/self/fd")
+        if not fd_dir.exists():
+            pytest.skip("Requires /proc to inspect open file descriptors")
+        count = 0
+        for fd in fd_dir.iterdir():
+            try:
+                if pathlib.Path(fd.resolve()) == path.resolve():
+                    count += 1
+            except OSError:
+                continue
+        return count
+
+    def test_parser_context_manager(self) -> None:
+        with TemporaryDirectory() as tempdir:
+            # Given a private copy of a binary, so no other parser holds it open
+            binary_path = pathlib.Path(tempdir) / "binary"
+            binary_path.write_bytes(TestMachoBinary.FAT_PATH.read_bytes())
+            # And a parser used as a context manager, whose slice is retained past the context
+            with MachoParser(binary_path) as parser:
+                binary = parser.get_arm64_slice()
+                assert binary is not None
+                assert self._open_descriptors_for(binary_path) == 1
+            # Then the file is released when the context exits
+            assert self._open_descriptors_for(binary_path) == 0
+            # And the parsed slice remains usable, even if the file is then modified on disk
+            binary_path.write_bytes(b"")
+            assert binary.get_virtual_base() == 0x100000000
+            assert binary.get_bytes(0, 4) == b"\xcf\xfa\xed\xfe"
+
+    def test_parser_releases_file_on_parse_failure(self) -> None:
+        with TemporaryDirectory() as tempdir:
+            # Given a file which isn't a Mach-O
+            binary_path = pathlib.Path(tempdir) / "not_a_binary"
+            binary_path.write_bytes(b"\x00" * 64)
+            # When it's parsed
+            with pytest.raises(ArchitectureNotSupportedError) as exc_info:
+                MachoParser(binary_path)
+            # Then the file isn't left open, even while the exception (and so the parser in its traceback) is alive
+            assert exc_info.traceback
+            assert self._open_descriptors_for(binary_path) == 0
+
     def test_correct_arch(self) -> None:
         # GoodCertificateValidation is known to be a thin arm64 slice
         assert self.binary is not None
@@ -87,6 +137,73 @@ class TestMachoBinary:
         assert self.binary.section_with_name("__objc_classlist", "__DATA") is not None
         assert self.binary.section_with_name("__data", "__DATA") is not None
         assert self.binary.section_with_name("fake_section", "__DATA") is None
+        # sections are only found within the segment that contains them
+        text_section = self.binary.section_with_name("__text", "__TEXT")
+        assert text_section is not None and text_section.segment.name == "__TEXT"
+        assert self.binary.section_with_name("__text", "__DATA") is None
+        assert self.binary.section_with_name("__data", "__TEXT") is None
+        assert self.binary.section_with_name("__text", "FAKE_SEGMENT") is None
+
+    def test_section_for_address(self) -> None:
+        # Every address within a section maps back to that section
+        for section in self.binary.sections:
+            if not section.size:
+                continue
+            assert self.binary.section_for_address(VirtualMemoryPointer(section.address)) is section
+            assert self.binary.section_for_address(VirtualMemoryPointer(section.end_address - 1)) is section
+        assert self.binary.section_name_for_address(VirtualMemoryPointer(0x100006300)) == "__text"
+        # Addresses below the virtual base aren't in any section
+        assert self.binary.section_for_address(VirtualMemoryPointer(0x1000)) is None
+        # Addresses past the last section fall back to the highest-addressed section
+        last_section = max(self.binary.sections, key=lambda s: s.address)
+        assert self.binary.section_for_address(VirtualMemoryPointer(last_section.end_address + 0x1000)) is last_section
+
+        # Given a binary whose only segment contains no sections
+        text_segment = MachoSegmentCommand64(
+            cmd=MachoLoadCommands.LC_SEGMENT_64,
+            cmdsize=sizeof(MachoSegmentCommand64),
+            segname=b"__TEXT",
+            vmaddr=0x100000000,
+            vmsize=0x4000,
+            filesize=0x4000,
+            maxprot=5,
+            initprot=5,
+        )
+        symtab = MachoSymtabCommand(cmd=MachoLoadCommands.LC_SYMTAB, cmdsize=sizeof(MachoSymtabCommand))
+        load_commands = bytes(text_segment) + bytes(symtab)
+        header = MachoHeader64(
+            magic=MachArch.MH_MAGIC_64,
+            cputype=MachArch.MH_CPU_TYPE_ARM64,
+            filetype=MachoFileType.MH_EXECUTE,
+            ncmds=2,
+            sizeofcmds=len(load_commands),
+        )
+        binary_data = bytes(header) + load_commands
+        sectionless_binary = MachoBinary(pathlib.Path("sectionless"), binary_data.ljust(0x4000, b"\x00"))
+        assert sectionless_binary.sections == []
+        # Then no address maps to a section
+        assert sectionless_binary.section_for_address(VirtualMemoryPointer(0x100000100)) is None
+
+    def test_sections_parsed_lazily(self) -> None:
+        # Given a freshly parsed binary
+        binary = MachoParser(self.FAT_PATH).get_arm64_slice()
+        assert binary is not None
+        # When the sections of a segment other than __TEXT are requested first
+        data_segment = binary.segment_with_name("__DATA")
+        assert data_segment is not None
+        data_sections = data_segment.sections
+        # Then that segment's sections are read correctly
+        assert len(data_sections) == data_segment.section_count
+        assert all(s.segment_name == "__DATA" for s in data_sections)
+        assert "__objc_classlist" in [s.name for s in data_sections]
+        # And sections of other segments can still be found by address
+        text_section = binary.section_for_address(VirtualMemoryPointer(0x100006300))
+        assert text_section is not None
+        assert (text_section.segment_name, text_section.name) == ("__TEXT", "__text")
+        # And every section is eventually available, in the order of the segment commands which contain them
+        assert binary.sections == [section for segment in binary.segments for section in segment.sections]
+        assert len(binary.sections) == sum(s.section_count for s in binary.segments)
+        assert binary.section_with_name("__objc_classlist", "__DATA") in data_sections
 
     def test_section_name_collision(self) -> None:
         # Given I provide a binary which has two sections with the same name
@@ -176,6 +293,16 @@ class TestMachoBinary:
         # Then I get the correct data
         assert sorted(locations_entries.items()) == sorted(correct_locations_entries.items())
 
+    def test_read_pointer_section_is_cached(self) -> None:
+        # Given a pointer section which has already been read
+        locations_entries = self.binary.read_pointer_section("__objc_classlist")
+        assert len(locations_entries) == 4
+        # When I read it again
+        # Then the previously decoded map is returned
+        assert self.binary.read_pointer_section("__objc_classlist") is locations_entries
+        # And a missing section is also remembered
+        assert self.binary.read_pointer_section("__objc_nonexistent") == {}
+
     def test_function_starts_command(self) -> None:
         # Given a binary that contains functions
         binary_with_functions = MachoParser(TestMachoBinary.CLASSLIST_DATA_CONST).get_arm64_slice()
@@ -679,6 +679,20 @@ class TestMachoAnalyzerDynStaticChecks:
             # (The address of the bound symbol in __objc_const should not be returned by this API)
             assert uiwebview_classref == objc_classrefs_binding
 
+    def test_returns_local_classref(self) -> None:
+        # Given a binary that contains locally implemented classes which are messaged via __objc_classrefs
+        with self.uiwebview_bound_symbol_collision() as (binary, analyzer):
+            # When the classref for a local class is queried
+            # Then the address of the __objc_classrefs entry pointing to the class is returned
+            assert analyzer.classref_for_class_name("LocalClass2") == VirtualMemoryPointer(0x10000C248)
+            assert analyzer.classref_for_class_name("SourceClass") == VirtualMemoryPointer(0x10000C258)
+            # And repeated queries return the same result
+            assert analyzer.classref_for_class_name("LocalClass2") == VirtualMemoryPointer(0x10000C248)
+
+            # When the classref for an unknown class is queried
+            # Then None is returned
+            assert analyzer.classref_for_class_name("_OBJC_CLASS_$_NotAClass") is None
+
     def test_class_name_for_class_pointer(self) -> None:
         # Given a binary that contains imported and local class names
         with self.uiwebview_bound_symbol_collision() as (binary, analyzer):
@@ -65,3 +65,21 @@ class TestMachoStringParser:
         symbol_name = self.string_helper.get_symbol_name_for_address(address)
         # The name is the expected value
         assert symbol_name == "__mh_execute_header"
+
+    def test_transform_string_section(self) -> None:
+        # Given a packed string table with an empty entry, a non-UTF-8 entry, and trailing unterminated data
+        strtab = b"first\x00\x00\xff\xfe\x00second\x00unterminated"
+        # When the string table is transformed
+        entries = MachoStringTableHelper.transform_string_section(strtab)
+        # Then each NULL-terminated entry is keyed by its start index
+        assert {idx: (entry.length, entry.full_string) for idx, entry in entries.items()} == {
+            0: (5, "first"),
+            6: (0, ""),
+            7: (2, "b'\\xff\\xfe'"),
+            10: (6, "second"),
+        }
+        # And a list of characters produces the same entries
+        list_entries = MachoStringTableHelper.transform_string_section(list(strtab))
+        assert {idx: entry.full_string for idx, entry in list_entries.items()} == {
+            idx: entry.full_string for idx, entry in entries.items()
+        }
@@ -93,6 +93,19 @@ class TestObjcRuntimeDataParser:
             assert objc_parser.path_for_external_symbol(symbol) == correct_map[symbol]
         assert objc_parser.path_for_external_symbol("XXX_fake_symbol_XXX") is None
 
+    def test_selref_for_selector_name(self) -> None:
+        parser = MachoParser(TestObjcRuntimeDataParser.FAT_PATH)
+        binary = parser.slices[0]
+        objc_parser = ObjcRuntimeDataParser(binary)
+
+        assert objc_parser.selref_for_selector_name("initWithFrame:") == VirtualMemoryPointer(0x100009070)
+        assert objc_parser.selref_for_selector_name("configureLabel") == VirtualMemoryPointer(0x100009078)
+        assert objc_parser.selref_for_selector_name("systemFontOfSize:") == VirtualMemoryPointer(0x100009088)
+        # Every selref should be reachable by its selector's name
+        for selref, selector in objc_parser.selrefs_to_selectors().items():
+            assert objc_parser.selref_for_selector_name(selector.name) == selref
+        assert objc_parser.selref_for_selector_name("XXX_fake_selector_XXX") is None
+
     def test_find_categories(self) -> None:
         parser = MachoParser(TestObjcRuntimeDataParser.CATEGORY_PATH)
         binary = parser.slices[0]